@@ -78,6 +78,23 @@ export interface CausalAnalysisResponse {
   };
 }
 
+export interface ActualVsPredictedPoint {
+  actual: number;
+  predicted: number;
+  residual: number;
+  period: number;
+  date: string;
+}
+
+// The backend sends actual-vs-predicted as parallel columns
+export interface ActualVsPredictedColumns {
+  actual: number[];
+  predicted: number[];
+  residual: number[];
+  period: number[];
+  date: string[];
+}
+
 /**
  * Utility functions for causal modeling
  */
@@ -99,6 +116,21 @@ export class CausalModelingUtils {
     return coef.toFixed(decimals);
   }
 
+  static actualVsPredictedRows(
+    predictions?: ActualVsPredictedColumns | ActualVsPredictedPoint[] | null
+  ): ActualVsPredictedPoint[] {
+    if (!predictions) return [];
+    // Results cached before the columnar format are already rows
+    if (Array.isArray(predictions)) return predictions;
+    return predictions.actual.map((actual, i) => ({
+      actual,
+      predicted: predictions.predicted[i],
+      residual: predictions.residual[i],
+      period: predictions.period[i],
+      date: predictions.date[i]
+    }));
+  }
+
   static interpretEffect(coefficient: number): string {
     if (coefficient > 0) {
       return coefficient > 0.5 ? 'Strong positive effect' : 'Positive effect';
@@ -7,7 +7,7 @@ import { Progress } from "@/components/ui/progress";
 import { Button } from "@/components/ui/button";
 import { LineChart, Line, XAxis, YAxis, CartesianGrid, Tooltip, Legend, ResponsiveContainer, BarChart, Bar, ScatterChart, Scatter, ReferenceLine } from "recharts";
 import { TrendingUp, Target, Zap, Award, AlertCircle, CheckCircle, ArrowLeft } from "lucide-react";
-import { CausalModelAnalysis, CausalAnalysisResponse } from "@/lib/causal-modeling";
+import { CausalModelAnalysis, CausalAnalysisResponse, CausalModelingUtils } from "@/lib/causal-modeling";
 import { useDAG } from "@/contexts/dag-context";
 import { Link } from "wouter";
 
@@ -110,6 +110,7 @@ export default function AnalysisResults() {
 
   const analysis = analysisState.lastAnalysis;
   const updatedDAG = analysisState.lastAnalysis?.updatedDAG;
+  const actualVsPredicted = CausalModelingUtils.actualVsPredictedRows(analysis?.predictions?.actualVsPredicted);
   
   // Debug the structure we're receiving
   console.log('ANALYSIS RESULTS DEBUG: Full analysis state:', analysisState.lastAnalysis);
@@ -648,7 +649,7 @@ export default function AnalysisResults() {
                 <div className="h-96">
                   <ResponsiveContainer width="100%" height="100%">
                     <ScatterChart
-                      data={analysisState.lastAnalysis?.predictions?.actualVsPredicted?.map(p => ({
+                      data={actualVsPredicted.map(p => ({
                         actual: p?.actual || 0,
                         predicted: p?.predicted || 0,
                         period: p?.period || '',
@@ -702,10 +703,10 @@ export default function AnalysisResults() {
                       {/* Perfect prediction line (y = x) */}
                       <ReferenceLine 
                         segment={[
-                          { x: Math.min(...(analysis?.predictions?.actualVsPredicted?.map(p => p.actual) || [0])), 
-                            y: Math.min(...(analysis?.predictions?.actualVsPredicted?.map(p => p.actual) || [0])) },
-                          { x: Math.max(...(analysis?.predictions?.actualVsPredicted?.map(p => p.actual) || [1])), 
-                            y: Math.max(...(analysis?.predictions?.actualVsPredicted?.map(p => p.actual) || [1])) }
+                          { x: Math.min(...(actualVsPredicted.length ? actualVsPredicted.map(p => p.actual) : [0])), 
+                            y: Math.min(...(actualVsPredicted.length ? actualVsPredicted.map(p => p.actual) : [0])) },
+                          { x: Math.max(...(actualVsPredicted.length ? actualVsPredicted.map(p => p.actual) : [1])), 
+                            y: Math.max(...(actualVsPredicted.length ? actualVsPredicted.map(p => p.actual) : [1])) }
                         ]}
                         stroke="#ef4444"
                         strokeDasharray="5 5"
@@ -771,7 +772,7 @@ export default function AnalysisResults() {
             </div>
 
             {/* Actual vs Predicted Over Time */}
-            {analysis?.predictions?.actualVsPredicted && analysis.predictions.actualVsPredicted.length > 0 && (
+            {actualVsPredicted.length > 0 && (
               <Card>
                 <CardHeader>
                   <CardTitle>Actual vs Predicted Over Time</CardTitle>
@@ -779,7 +780,7 @@ export default function AnalysisResults() {
                 </CardHeader>
                 <CardContent>
                   <ResponsiveContainer width="100%" height={300}>
-                    <LineChart data={analysis?.predictions?.actualVsPredicted || []}>
+                    <LineChart data={actualVsPredicted}>
                       <CartesianGrid strokeDasharray="3 3" />
                       <XAxis 
                         dataKey="date" 
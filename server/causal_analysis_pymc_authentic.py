@@ -4,11 +4,13 @@ Authentic PyMC + pgmpy Causal Analysis
 Following user's exact Jupyter notebook methodology
 """
 
-import json
+import math
+import os
+import stat
 import sys
 import time
 import numpy as np
-import pandas as pd
+import orjson
 from typing import Dict, List, Any
 import warnings
 warnings.filterwarnings('ignore')
@@ -16,27 +18,64 @@ warnings.filterwarnings('ignore')
 def debug_print(msg):
     print(f"DEBUG: {msg}", file=sys.stderr)
 
-# Import PyMC and pgmpy - authentic implementation only
-try:
-    import pymc as pm
-    import arviz as az
-    from pgmpy.models import LinearGaussianBayesianNetwork
-    from pgmpy.factors.continuous import LinearGaussianCPD
-    from scipy import stats
-    debug_print("PyMC and pgmpy imported successfully")
-except ImportError as e:
-    debug_print(f"Missing dependencies: {e}")
-    print(json.dumps({
-        "success": False,
-        "error": f"PyMC/pgmpy dependencies not available: {e}",
-        "method": "pymc_required",
-        "parameters": {"edges": []},
-        "updatedDAG": {"nodes": [], "edges": []},
-        "performance": {},
-        "predictions": {"actualVsPredicted": []},
-        "incrementalityAnalysis": {}
-    }))
-    sys.exit(1)
+def write_stdout(payload: bytes):
+    """Write UTF-8 bytes straight to stdout, skipping the text-mode encode"""
+    sys.stdout.flush()
+    sys.stdout.buffer.write(payload)
+    sys.stdout.buffer.flush()
+
+# Shared shape of every failure response; spread it and set "error"
+ERROR_RESULT_TEMPLATE = {
+    "success": False,
+    "method": "pymc_lineargaussian_cpd",
+    "parameters": {"edges": []},
+    "updatedDAG": {"nodes": [], "edges": []},
+    "performance": {},
+    "predictions": {"actualVsPredicted": []},
+    "incrementalityAnalysis": {}
+}
+
+# PyMC, pgmpy and pandas are imported on the first request by
+# load_analysis_backend(), so bad input never pays their import cost
+pd = pm = az = stats = None
+LinearGaussianBayesianNetwork = LinearGaussianCPD = None
+NUTS_SAMPLER = "pymc"
+NUTS_SAMPLER_KWARGS = {}
+
+def load_analysis_backend():
+    """Import PyMC and pgmpy once; later calls are no-ops"""
+    global pd, pm, az, stats, LinearGaussianBayesianNetwork, LinearGaussianCPD
+    global NUTS_SAMPLER, NUTS_SAMPLER_KWARGS
+    if pm is not None:
+        return
+    
+    # Import PyMC and pgmpy - authentic implementation only
+    try:
+        import pandas as pd
+        import pymc as pm
+        import arviz as az
+        from pgmpy.models import LinearGaussianBayesianNetwork
+        from pgmpy.factors.continuous import LinearGaussianCPD
+        from scipy import stats
+        debug_print("PyMC and pgmpy imported successfully")
+    except ImportError as e:
+        debug_print(f"Missing dependencies: {e}")
+        write_framed(orjson.dumps({
+            **ERROR_RESULT_TEMPLATE,
+            "error": f"PyMC/pgmpy dependencies not available: {e}",
+            "method": "pymc_required"
+        }))
+        sys.exit(1)
+    
+    # NumPyro NUTS (JAX/XLA-compiled) backend for pm.sample; fall back to PyMC's own NUTS
+    try:
+        import numpyro  # noqa: F401
+        NUTS_SAMPLER = "numpyro"
+        # Run chains as a vmap'd batch dimension rather than one after another
+        NUTS_SAMPLER_KWARGS = {"chain_method": "vectorized"}
+        debug_print("NumPyro available, using JAX NUTS sampler")
+    except ImportError as e:
+        debug_print(f"NumPyro not available ({e}), using PyMC NUTS sampler")
 
 def find_column_for_node(node_id: str, available_columns: List[str]) -> str:
     """Find matching column for node ID"""
@@ -70,32 +109,46 @@ def find_column_for_node(node_id: str, available_columns: List[str]) -> str:
     debug_print(f"No match found for {base_node} in {available_columns}")
     return None
 
-def parse_input_data(data: List[List[Any]], config: Dict[str, Any]) -> pd.DataFrame:
-    """Parse CSV data into DataFrame"""
+def rows_to_columns(data: List[List[Any]], config: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """Transpose CSV rows into one contiguous array per column"""
     debug_print(f"Parsing data with {len(data)} rows")
     
     if config.get('hasHeaders', True):
         columns = data[0]
-        df_data = data[1:]
+        rows = data[1:]
     else:
         columns = [f"col_{i}" for i in range(len(data[0]))]
-        df_data = data
+        rows = data
     
     debug_print(f"Columns: {columns}")
     
-    df = pd.DataFrame(df_data, columns=columns)
-    
-    # Convert to numeric (skip date columns)
-    for col in df.columns:
+    n_rows = len(rows)
+    column_data = {}
+    for j, col in enumerate(columns):
+        # Single exact-size allocation; no intermediate list per column.
+        # Short rows (e.g. blank CSV lines) yield None and are dropped by dropna()
+        values = np.fromiter(
+            (row[j] if j < len(row) else None for row in rows),
+            dtype=object,
+            count=n_rows
+        )
+        # Convert to numeric (skip date columns)
         if col.lower() != 'date':
-            df[col] = pd.to_numeric(df[col], errors='coerce')
+            values = pd.to_numeric(values, errors='coerce').astype(np.float64, copy=False)
+        column_data[col] = values
+    
+    return column_data
+
+def parse_input_data(column_data: Dict[str, np.ndarray]) -> "pd.DataFrame":
+    """Build DataFrame from column arrays"""
+    df = pd.DataFrame(column_data, copy=False)
     
     # Remove rows with missing values
     df = df.dropna()
     debug_print(f"Final DataFrame shape: {df.shape}")
     return df
 
-def perform_authentic_pymc_analysis(data: List[List[Any]], config: Dict[str, Any], dag_structure: Dict[str, Any]) -> Dict[str, Any]:
+def perform_authentic_pymc_analysis(column_data: Dict[str, np.ndarray], dag_structure: Dict[str, Any]) -> Dict[str, Any]:
     """
     Authentic PyMC + pgmpy LinearGaussianCPD analysis
     Following user's Jupyter notebook methodology EXACTLY
@@ -104,7 +157,7 @@ def perform_authentic_pymc_analysis(data: List[List[Any]], config: Dict[str, Any
     
     try:
         # Parse data
-        df = parse_input_data(data, config)
+        df = parse_input_data(column_data)
         df_original = df.copy()
         
         debug_print(f"Data columns: {list(df.columns)}")
@@ -134,16 +187,7 @@ def perform_authentic_pymc_analysis(data: List[List[Any]], config: Dict[str, Any
         debug_print(f"Final unique DAG edges: {len(dag_edges)}")
         
         if not dag_edges:
-            return {
-                "success": False,
-                "error": "No valid DAG edges found after column mapping",
-                "method": "pymc_lineargaussian_cpd",
-                "parameters": {"edges": []},
-                "updatedDAG": {"nodes": [], "edges": []},
-                "performance": {},
-                "predictions": {"actualVsPredicted": []},
-                "incrementalityAnalysis": {}
-            }
+            return {**ERROR_RESULT_TEMPLATE, "error": "No valid DAG edges found after column mapping"}
         
         # Create pgmpy LinearGaussianBayesianNetwork
         lgbn = LinearGaussianBayesianNetwork(dag_edges)
@@ -233,7 +277,7 @@ def perform_authentic_pymc_analysis(data: List[List[Any]], config: Dict[str, Any
                 start_time = time.time()
                 
                 # Efficient sampling for small datasets
-                debug_print(f"Starting PyMC sampling with progress bar enabled...")
+                debug_print(f"Starting PyMC sampling ({NUTS_SAMPLER} NUTS) with progress bar enabled...")
                 idata = pm.sample(
                     draws=2000,        # User's specification
                     tune=1000,         # User's specification  
@@ -242,7 +286,9 @@ def perform_authentic_pymc_analysis(data: List[List[Any]], config: Dict[str, Any
                     progressbar=True,  # Enable progress bar for console
                     random_seed=44,    # User's exact seed
                     compute_convergence_checks=False,  # Skip for speed
-                    return_inferencedata=True
+                    return_inferencedata=True,
+                    nuts_sampler=NUTS_SAMPLER,  # JIT-compiled NUTS via JAX when available
+                    nuts_sampler_kwargs=NUTS_SAMPLER_KWARGS
                 )
                 
                 elapsed = time.time() - start_time
@@ -463,14 +509,22 @@ def perform_authentic_pymc_analysis(data: List[List[Any]], config: Dict[str, Any
                 
                 debug_print(f"Generated {len(y_predicted)} authentic predictions using fitted PyMC model")
                 
-                for i in range(len(y_actual)):
-                        predictions["actualVsPredicted"].append({
-                            "actual": float(y_actual[i]),
-                            "predicted": float(y_predicted[i]),
-                            "residual": float(y_actual[i] - y_predicted[i]),
-                            "period": i + 1,
-                            "date": str(df.iloc[i].get('date', f'Period {i+1}'))
-                        })
+                # Parallel columns instead of per-period dicts; the arrays are
+                # already contiguous float64, so orjson serializes them as-is.
+                # NaN/Inf are sanitized in bulk when the result is serialized.
+                n_periods = len(y_actual)
+                if 'date' in df.columns:
+                    dates = df['date'].iloc[:n_periods].astype(str).tolist()
+                else:
+                    dates = [f'Period {i+1}' for i in range(n_periods)]
+                
+                predictions["actualVsPredicted"] = {
+                    "actual": y_actual,
+                    "predicted": y_predicted,
+                    "residual": y_actual - y_predicted,
+                    "period": np.arange(1, n_periods + 1),
+                    "date": dates
+                }
                         
         except Exception as e:
             debug_print(f"Error generating authentic predictions: {e}")
@@ -617,79 +671,145 @@ def perform_authentic_pymc_analysis(data: List[List[Any]], config: Dict[str, Any
         import traceback
         traceback.print_exc(file=sys.stderr)
         
-        return {
-            "success": False,
-            "error": f"PyMC analysis failed: {str(e)}",
-            "method": "pymc_lineargaussian_cpd",
-            "parameters": {"edges": []},
-            "updatedDAG": {"nodes": [], "edges": []},
-            "performance": {},
-            "predictions": {"actualVsPredicted": []},
-            "incrementalityAnalysis": {}
-        }
+        return {**ERROR_RESULT_TEMPLATE, "error": f"PyMC analysis failed: {str(e)}"}
+
+def clean_json_values(obj):
+    """Replace NaN/Inf with 0.0 so the result is valid JSON.
+
+    Arrays are sanitized in bulk; only containers are recursed.
+    """
+    if isinstance(obj, dict):
+        return {k: clean_json_values(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [clean_json_values(v) for v in obj]
+    if isinstance(obj, np.ndarray):
+        # One reduction for the common all-finite case; only copy when needed
+        if obj.dtype.kind == 'f' and not np.isfinite(obj).all():
+            obj = np.nan_to_num(obj, nan=0.0, posinf=0.0, neginf=0.0)
+        return obj  # serialized natively by orjson
+    if isinstance(obj, (float, np.floating)):
+        # math.isfinite is a plain C check; no numpy scalar round-trip.
+        # np.float32 posterior stats are not float subclasses, so box them here
+        # rather than letting orjson emit NaN as null.
+        return float(obj) if math.isfinite(obj) else 0.0
+    return obj
+
+def _orjson_default(obj):
+    """Fallback for values orjson cannot serialize natively"""
+    if isinstance(obj, np.ndarray):
+        # Non-contiguous or unsupported dtype arrays
+        return clean_json_values(obj.tolist())
+    if isinstance(obj, np.generic):
+        return clean_json_values(obj.item())
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+def dumps_result(result: Dict[str, Any]) -> bytes:
+    """Serialize a cleaned result dict to compact UTF-8 JSON"""
+    # orjson never emits insignificant whitespace, so no separators=(',', ':')
+    # equivalent is needed; do not add OPT_INDENT_2 on this hot path
+    return orjson.dumps(
+        result,
+        option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+        default=_orjson_default
+    )
+
+def handle_request(raw: bytes) -> bytes:
+    """Run one analysis request and return the serialized result"""
+    parsed_input = orjson.loads(raw)
+    data = parsed_input["data"]
+    config = parsed_input["config"] 
+    dag_structure = parsed_input["dagStructure"]
+    
+    debug_print(f"Data rows: {len(data)}, Edges: {len(dag_structure.get('edges', []))}")
+    
+    load_analysis_backend()
+    
+    # Columnar view of the CSV rows, built once up front
+    column_data = rows_to_columns(data, config)
+    del data, parsed_input
+    
+    # Perform authentic PyMC analysis
+    result = perform_authentic_pymc_analysis(column_data, dag_structure)
+    
+    # Clean result of any NaN or infinity values
+    cleaned_result = clean_json_values(result)
+    
+    debug_print("Outputting authentic PyMC results...")
+    return dumps_result(cleaned_result)
+
+JSON_START = b"===JSON_START===\n"
+JSON_END = b"\n===JSON_END===\n"
+
+def write_framed(payload: bytes):
+    """Write a JSON payload between the stdout sentinels"""
+    if not hasattr(os, "writev"):
+        write_stdout(JSON_START + payload + JSON_END)
+        return
+    
+    # Gather-write sentinels and payload in one syscall without concatenating
+    sys.stdout.flush()
+    sys.stdout.buffer.flush()
+    fd = sys.stdout.buffer.fileno()
+    buffers = [memoryview(JSON_START), memoryview(payload), memoryview(JSON_END)]
+    while buffers:
+        written = os.writev(fd, buffers)
+        # Drop fully written buffers and trim a partially written one
+        while buffers and written >= len(buffers[0]):
+            written -= len(buffers[0])
+            buffers.pop(0)
+        if buffers and written:
+            buffers[0] = buffers[0][written:]
+
+def read_requests():
+    """
+    Yield raw JSON requests from stdin. Over a pipe or socket (the Node
+    worker) requests are newline-delimited; a redirected file or terminal
+    holds a single, possibly pretty-printed, request.
+    """
+    stdin = sys.stdin.buffer
+    mode = os.fstat(stdin.fileno()).st_mode
+    if not (stat.S_ISFIFO(mode) or stat.S_ISSOCK(mode)):
+        raw = stdin.read()
+        if raw.strip():
+            yield raw
+        return
+    
+    for line in iter(stdin.readline, b""):
+        if line.strip():
+            yield line
 
 def main():
-    try:
-        debug_print("Starting authentic PyMC + pgmpy analysis script")
-        
-        # Read input from stdin
-        input_data = sys.stdin.read()
-        if not input_data.strip():
-            debug_print("No input provided")
-            print(json.dumps({"error": "No input provided"}))
-            sys.exit(1)
-        
+    debug_print("Starting authentic PyMC + pgmpy analysis worker")
+    
+    # PyMC, pgmpy and JAX imports stay warm between requests.
+    # Every response, including failures, is framed by the sentinels;
+    # the exit code reports whether the last request failed.
+    handled = 0
+    failed = False
+    for line in read_requests():
         debug_print("Input received, parsing JSON...")
+        try:
+            payload = handle_request(line)
+            failed = False
+        except Exception as e:
+            debug_print(f"Script error: {e}")
+            import traceback
+            traceback.print_exc(file=sys.stderr)
+            
+            error_result = {**ERROR_RESULT_TEMPLATE, "error": f"Script execution failed: {str(e)}"}
+            payload = orjson.dumps(error_result)
+            failed = True
         
-        # Parse input
-        parsed_input = json.loads(input_data)
-        data = parsed_input["data"]
-        config = parsed_input["config"] 
-        dag_structure = parsed_input["dagStructure"]
-        
-        debug_print(f"Data rows: {len(data)}, Edges: {len(dag_structure.get('edges', []))}")
-        
-        # Perform authentic PyMC analysis
-        result = perform_authentic_pymc_analysis(data, config, dag_structure)
-        
-        # Clean result of any NaN or infinity values
-        def clean_json_values(obj):
-            if isinstance(obj, dict):
-                return {k: clean_json_values(v) for k, v in obj.items()}
-            elif isinstance(obj, list):
-                return [clean_json_values(v) for v in obj]
-            elif isinstance(obj, float):
-                if np.isnan(obj) or np.isinf(obj):
-                    return 0.0
-                return obj
-            return obj
-        
-        cleaned_result = clean_json_values(result)
-        
-        # Output result
-        debug_print("Outputting authentic PyMC results...")
-        result_json = json.dumps(cleaned_result, ensure_ascii=False, separators=(',', ':'))
-        print("===JSON_START===")
-        print(result_json)
-        print("===JSON_END===")
-        
-    except Exception as e:
-        debug_print(f"Script error: {e}")
-        import traceback
-        traceback.print_exc(file=sys.stderr)
-        
-        error_result = {
-            "success": False,
-            "error": f"Script execution failed: {str(e)}",
-            "method": "pymc_lineargaussian_cpd", 
-            "parameters": {"edges": []},
-            "updatedDAG": {"nodes": [], "edges": []},
-            "performance": {},
-            "predictions": {"actualVsPredicted": []},
-            "incrementalityAnalysis": {}
-        }
-        print(json.dumps(error_result))
+        write_framed(payload)
+        handled += 1
+    
+    if not handled:
+        debug_print("No input provided")
+        write_framed(orjson.dumps({"error": "No input provided"}))
+        sys.exit(1)
+    
+    if failed:
         sys.exit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
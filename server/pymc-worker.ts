@@ -0,0 +1,248 @@
+import { spawn, type ChildProcessWithoutNullStreams } from "child_process";
+
+const JSON_START = '===JSON_START===';
+const JSON_END = '===JSON_END===';
+
+export class PymcWorkerError extends Error {
+  constructor(message: string, public readonly errorOutput: string, public readonly code?: number) {
+    super(message);
+  }
+}
+
+export class PymcWorkerBusyError extends PymcWorkerError {
+  constructor() {
+    super("Too many analyses in progress, try again later", '');
+  }
+}
+
+export class PymcWorkerTimeoutError extends PymcWorkerError {
+  constructor(errorOutput: string) {
+    super("Analysis timed out", errorOutput);
+  }
+}
+
+interface PendingRequest {
+  payload: string;
+  // Absolute time (ms since epoch) by which the request must be answered,
+  // covering both time spent queued and the analysis itself
+  deadline: number;
+  resolve: (result: any) => void;
+  reject: (error: Error) => void;
+  timer?: NodeJS.Timeout;
+}
+
+/**
+ * One long-lived server/causal_analysis_pymc_authentic.py process.
+ * Requests are written as newline-delimited JSON and answered one at a time
+ * between the JSON_START/JSON_END sentinels, so PyMC/JAX imports are reused
+ * across analyses instead of paid on every call.
+ */
+class PymcWorker {
+  private process: ChildProcessWithoutNullStreams;
+  private current: PendingRequest | null = null;
+  private output = '';
+  // Offset in `output` from which the next JSON_END search starts
+  private scanned = 0;
+  private errorOutput = '';
+
+  constructor(private readonly onFinished: (worker: PymcWorker, exited: boolean) => void) {
+    this.process = this.start();
+  }
+
+  get busy(): boolean {
+    return this.current !== null;
+  }
+
+  // The analysis gets whatever is left of the request's deadline
+  run(request: PendingRequest) {
+    this.current = request;
+    this.output = '';
+    this.scanned = 0;
+    this.errorOutput = '';
+    clearTimeout(request.timer);
+    request.timer = setTimeout(() => this.timeout(request), Math.max(0, request.deadline - Date.now()));
+    this.process.stdin.write(request.payload + '\n');
+  }
+
+  private start(): ChildProcessWithoutNullStreams {
+    console.log('=== STARTING PYMC WORKER: server/causal_analysis_pymc_authentic.py ===');
+    const python = spawn('poetry', ['run', 'python', 'server/causal_analysis_pymc_authentic.py'], {
+      stdio: ['pipe', 'pipe', 'pipe'],
+      cwd: process.cwd(),
+      env: {
+        ...process.env,
+        PATH: `${process.env.HOME}/.local/bin:${process.env.PATH}`,
+        OMP_NUM_THREADS: '4',
+        MKL_NUM_THREADS: '4',
+        NUMBA_NUM_THREADS: '4',
+        OPENBLAS_NUM_THREADS: '4'
+      }
+    });
+
+    // Decode as a stream so multi-byte characters split across chunks survive
+    python.stdout.setEncoding('utf8');
+    python.stdout.on('data', (data: string) => {
+      this.output += data;
+      this.drain();
+    });
+
+    python.stderr.on('data', (data: Buffer) => {
+      this.errorOutput += data.toString();
+    });
+
+    // EPIPE on stdin (e.g. the worker exited before 'close' fired) or a
+    // failed spawn would otherwise surface as an uncaught exception
+    python.on('error', (error: Error) => this.fail(error.message));
+    python.stdin.on('error', (error: Error) => this.fail(error.message));
+    python.on('close', (code: number) => this.fail(this.errorOutput || "Unknown error occurred", code));
+
+    return python;
+  }
+
+  private drain() {
+    const request = this.current;
+    if (!request) return;
+
+    // Only search text that arrived since the last chunk, backing up far
+    // enough to catch a sentinel split across chunks
+    const jsonEnd = this.output.indexOf(JSON_END, this.scanned);
+    if (jsonEnd === -1) {
+      this.scanned = Math.max(0, this.output.length - JSON_END.length + 1);
+      return;
+    }
+
+    const jsonStart = this.output.lastIndexOf(JSON_START, jsonEnd);
+    const cleanOutput = this.output.substring(jsonStart === -1 ? 0 : jsonStart + JSON_START.length, jsonEnd).trim();
+    this.output = this.output.substring(jsonEnd + JSON_END.length);
+    this.scanned = 0;
+    this.current = null;
+    clearTimeout(request.timer);
+
+    try {
+      request.resolve(JSON.parse(cleanOutput));
+    } catch (parseError: any) {
+      console.error('JSON parse error:', parseError);
+      console.error('Raw output length:', cleanOutput.length);
+      console.error('Raw output preview:', cleanOutput.substring(0, 500));
+      request.reject(new PymcWorkerError("Failed to parse analysis results", parseError.message));
+    }
+    this.onFinished(this, false);
+  }
+
+  private timeout(request: PendingRequest) {
+    if (this.current !== request) return;
+    this.current = null;
+    request.reject(new PymcWorkerTimeoutError(this.errorOutput));
+    this.stop();
+  }
+
+  // The process exited or broke; fail whatever it was running and retire it
+  private fail(errorOutput: string, code?: number) {
+    const pending = this.current;
+    this.current = null;
+    if (pending) {
+      clearTimeout(pending.timer);
+      console.error('Python causal analysis error:', errorOutput);
+      pending.reject(new PymcWorkerError("Causal analysis failed", errorOutput, code));
+    }
+    this.stop();
+  }
+
+  private stop() {
+    const python = this.process;
+    python.removeAllListeners('close');
+    python.stdout.removeAllListeners('data');
+    python.stderr.removeAllListeners('data');
+    python.kill('SIGTERM');
+    setTimeout(() => python.kill('SIGKILL'), 5000).unref(); // Force kill after 5s if needed
+    this.onFinished(this, true);
+  }
+}
+
+/**
+ * Runs analyses on up to `maxWorkers` PymcWorker processes at once. Idle
+ * workers are kept warm for the next request; another one is spawned only
+ * when all are busy. Requests beyond that wait in a queue of at most
+ * `maxQueued` entries and are turned away once it is full. A request's
+ * timeout runs from the moment analyze() is called, so a queued request
+ * times out just like a running one.
+ */
+export class PymcWorkerPool {
+  private workers: PymcWorker[] = [];
+  private queue: PendingRequest[] = [];
+
+  constructor(private readonly maxWorkers: number, private readonly maxQueued: number) {}
+
+  analyze(input: unknown, timeoutMs: number): Promise<any> {
+    return new Promise((resolve, reject) => {
+      const request: PendingRequest = {
+        payload: JSON.stringify(input),
+        deadline: Date.now() + timeoutMs,
+        resolve,
+        reject
+      };
+
+      const worker = this.available();
+      if (worker) {
+        worker.run(request);
+        return;
+      }
+      if (this.queue.length >= this.maxQueued) {
+        reject(new PymcWorkerBusyError());
+        return;
+      }
+      request.timer = setTimeout(() => this.expire(request), timeoutMs);
+      this.queue.push(request);
+    });
+  }
+
+  // An idle worker, or a new one if the pool has room; undefined when all
+  // `maxWorkers` are busy
+  private available(): PymcWorker | undefined {
+    const idle = this.workers.find((w) => !w.busy);
+    if (idle || this.workers.length >= this.maxWorkers) return idle;
+
+    const worker = new PymcWorker((w, exited) => this.finished(w, exited));
+    this.workers.push(worker);
+    return worker;
+  }
+
+  private next() {
+    while (this.queue.length > 0) {
+      const worker = this.available();
+      if (!worker) return;
+      worker.run(this.queue.shift()!);
+    }
+  }
+
+  private expire(request: PendingRequest) {
+    const index = this.queue.indexOf(request);
+    if (index === -1) return;
+    this.queue.splice(index, 1);
+    request.reject(new PymcWorkerTimeoutError(''));
+  }
+
+  private finished(worker: PymcWorker, exited: boolean) {
+    if (exited) {
+      const index = this.workers.indexOf(worker);
+      if (index === -1) return;
+      this.workers.splice(index, 1);
+    }
+    this.next();
+  }
+}
+
+// Non-negative integer from the environment, or `fallback` when unset or
+// malformed (parseInt would turn "abc" into NaN and disable the limit)
+function envLimit(name: string, fallback: number, min: number): number {
+  const value = process.env[name];
+  if (!value || !/^\d+$/.test(value)) return fallback;
+  const limit = parseInt(value, 10);
+  return limit >= min ? limit : fallback;
+}
+
+export const pymcWorkerPool = new PymcWorkerPool(
+  envLimit('PYMC_WORKERS', 2, 1),
+  // 0 disables queueing: requests are rejected only when every worker is busy
+  envLimit('PYMC_MAX_QUEUED', 8, 0)
+);
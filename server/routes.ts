@@ -1,7 +1,7 @@
 import type { Express } from "express";
 import { createServer, type Server } from "http";
-import { spawn } from "child_process";
 import { storage } from "./storage";
+import { pymcWorkerPool, PymcWorkerBusyError, PymcWorkerError, PymcWorkerTimeoutError } from "./pymc-worker";
 import { insertCausalModelSchema } from "@shared/schema";
 import { z } from "zod";
 
@@ -128,103 +128,39 @@ export async function registerRoutes(app: Express): Promise<Server> {
         return res.status(400).json({ message: "No data rows found" });
       }
 
-      // Call authentic PyMC + pgmpy causal analysis script
-      console.log('=== CALLING AUTHENTIC PYMC SCRIPT: server/causal_analysis_pymc_authentic.py ===');
-      const python = spawn('poetry', ['run', 'python', 'server/causal_analysis_pymc_authentic.py'], {
-        stdio: ['pipe', 'pipe', 'pipe'],
-        cwd: process.cwd(),
-        env: { 
-          ...process.env, 
-          PATH: `${process.env.HOME}/.local/bin:${process.env.PATH}`,
-          OMP_NUM_THREADS: '4',
-          MKL_NUM_THREADS: '4',
-          NUMBA_NUM_THREADS: '4',
-          OPENBLAS_NUM_THREADS: '4'
+      // Call authentic PyMC + pgmpy causal analysis worker
+      console.log('=== CALLING AUTHENTIC PYMC WORKER: server/causal_analysis_pymc_authentic.py ===');
+      let result: any;
+      try {
+        // 10 minute timeout for full PyMC with 2000 draws, including any time
+        // spent queued behind other analyses
+        result = await pymcWorkerPool.analyze({ data: parsedData, config, dagStructure }, 600000);
+      } catch (workerError) {
+        if (!(workerError instanceof PymcWorkerError)) throw workerError;
+        if (workerError instanceof PymcWorkerBusyError) {
+          return res.status(503).json({ message: workerError.message });
         }
-      });
-
-      const inputData = JSON.stringify({
-        data: parsedData,
-        config,
-        dagStructure
-      });
-
-      python.stdin.write(inputData);
-      python.stdin.end();
-
-      let output = '';
-      let errorOutput = '';
-
-      python.stdout.on('data', (data: Buffer) => {
-        output += data.toString();
-      });
-
-      python.stderr.on('data', (data: Buffer) => {
-        errorOutput += data.toString();
-      });
-
-      let responseHandled = false;
-
-      python.on('close', (code: number) => {
-        if (responseHandled) return;
-        responseHandled = true;
-        
-        if (code !== 0) {
-          console.error('Python causal analysis error:', errorOutput);
-          return res.status(500).json({ 
-            message: "Causal analysis failed", 
-            error: errorOutput || "Unknown error occurred" 
-          });
+        if (workerError instanceof PymcWorkerTimeoutError) {
+          return res.status(408).json({ message: workerError.message });
         }
+        return res.status(500).json({
+          message: workerError.message,
+          error: workerError.errorOutput
+        });
+      }
 
-        try {
-          // Extract clean JSON from marked output
-          const jsonStart = output.indexOf('===JSON_START===');
-          const jsonEnd = output.indexOf('===JSON_END===');
-          
-          let cleanOutput = output;
-          if (jsonStart !== -1 && jsonEnd !== -1) {
-            const jsonStartIndex = jsonStart + '===JSON_START==='.length;
-            cleanOutput = output.substring(jsonStartIndex, jsonEnd).trim();
-          }
-          
-          const result = JSON.parse(cleanOutput);
-          if (result.error) {
-            return res.status(500).json({ message: result.error });
-          }
-          
-          // Debug the exact response structure
-          console.log('=== BACKEND RESPONSE STRUCTURE DEBUG ===');
-          console.log('Full result:', JSON.stringify(result, null, 2));
-          console.log('result.updatedDAG:', result.updatedDAG);
-          console.log('result.updatedDAG?.edges:', result.updatedDAG?.edges);
-          console.log('Number of edges in backend response:', result.updatedDAG?.edges?.length);
-          
-          res.json(result);
-        } catch (parseError) {
-          console.error('JSON parse error:', parseError);
-          console.error('Raw output length:', output.length);
-          console.error('Raw output preview:', output.substring(0, 500));
-          res.status(500).json({ 
-            message: "Failed to parse analysis results", 
-            error: parseError.message 
-          });
-        }
-      });
-
-      // Handle timeout - increased for full PyMC computations  
-      const timeout = setTimeout(() => {
-        if (responseHandled) return;
-        responseHandled = true;
-        python.kill('SIGTERM');
-        setTimeout(() => python.kill('SIGKILL'), 5000); // Force kill after 5s if needed
-        res.status(408).json({ message: "Analysis timed out" });
-      }, 600000); // 10 minute timeout for full PyMC with 2000 draws
-
-      // Clear timeout if process completes normally
-      python.on('close', () => {
-        clearTimeout(timeout);
-      });
+      if (result.error) {
+        return res.status(500).json({ message: result.error });
+      }
+      
+      // Debug the exact response structure
+      console.log('=== BACKEND RESPONSE STRUCTURE DEBUG ===');
+      console.log('Full result:', JSON.stringify(result, null, 2));
+      console.log('result.updatedDAG:', result.updatedDAG);
+      console.log('result.updatedDAG?.edges:', result.updatedDAG?.edges);
+      console.log('Number of edges in backend response:', result.updatedDAG?.edges?.length);
+      
+      res.json(result);
 
     } catch (error) {
       console.error('Causal analysis error:', error);